@@ -0,0 +1,207 @@
+import numpy as np  # type: ignore
+from scipy.optimize import minimize  # type: ignore
+
+# numba is optional: without it the param finder scores every candidate with statsmodels.
+try:
+    from numba import njit  # type: ignore
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """
+        Stand-in for numba.njit that leaves the function as plain python.
+        """
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# Work arrays for the Kalman filter, keyed by the state dimension r. Candidates with the same
+# r (and every likelihood evaluation while fitting one of them) reuse the same arrays.
+_WORKSPACES = {}
+
+
+def _get_workspace(r):
+    """
+    Returns the (T, R, lhs, P, a, a_next, K, TP) work arrays for a state dimension of r.
+    """
+    if r not in _WORKSPACES:
+        _WORKSPACES[r] = (np.zeros((r, r)), np.zeros(r), np.zeros((r * r, r * r)), np.zeros((r, r)),
+                          np.zeros(r), np.zeros(r), np.zeros(r), np.zeros((r, r)))
+    return _WORKSPACES[r]
+
+
+@njit(cache=True, fastmath=True)
+def _arma_loglike_kernel(y, phi, theta, trend, diffuse, T, R, lhs, P, a, a_next, K, TP):
+    """
+    Kalman filter recursions behind arma_concentrated_loglike, written with explicit loops
+    into the preallocated work arrays so that no arrays are allocated per time step.
+    """
+    p = phi.shape[0]
+    q = theta.shape[0]
+    k_trend = trend.shape[0]
+    r = T.shape[0]
+    n = y.shape[0]
+
+    T[:, :] = 0.0
+    for i in range(p):
+        T[i, 0] = phi[i]
+    for i in range(r - 1):
+        T[i, i + 1] = 1.0
+    R[:] = 0.0
+    R[0] = 1.0
+    for i in range(q):
+        R[i + 1] = theta[i]
+
+    if diffuse:
+        # Approximate diffuse initialization, like SARIMAX with enforce_stationarity=False
+        P[:, :] = 0.0
+        for i in range(r):
+            P[i, i] = 1e6
+        a[:] = 0.0
+        burn = r
+    else:
+        # Initialize with the unconditional state covariance: vec(P) = (I - T kron T)^-1 vec(RR')
+        for i in range(r):
+            for j in range(r):
+                for k in range(r):
+                    for l in range(r):
+                        lhs[i * r + k, j * r + l] = -T[i, j] * T[k, l]
+        for i in range(r * r):
+            lhs[i, i] += 1.0
+        if abs(np.linalg.det(lhs)) < 1e-12:
+            return -np.inf
+        P[:, :] = np.linalg.solve(lhs, np.outer(R, R).ravel()).reshape((r, r))
+        # and the unconditional state mean: a = (I - T)^-1 c, with c the first state intercept
+        TP[:, :] = -T
+        for i in range(r):
+            TP[i, i] += 1.0
+        a[:] = 0.0
+        for k in range(k_trend):
+            a[0] += trend[k]
+        a[:] = np.linalg.solve(TP, a)
+        burn = 0
+
+    sum_log_F = 0.0
+    sum_v2_F = 0.0
+    for t in range(n):
+        v = y[t] - a[0]
+        F = P[0, 0]
+        if F <= 0.0:
+            return -np.inf
+        if t >= burn:
+            sum_log_F += np.log(F)
+            sum_v2_F += v * v / F
+        # K = T P Z' / F and a = T a + c + K v, where the trend enters the first state
+        # as the intercept c = trend[0] + trend[1] * (t + 1) + ... (same as SARIMAX)
+        for i in range(r):
+            k_i = 0.0
+            a_i = 0.0
+            for j in range(r):
+                k_i += T[i, j] * P[j, 0]
+                a_i += T[i, j] * a[j]
+            K[i] = k_i / F
+            a_next[i] = a_i + K[i] * v
+        for k in range(k_trend):
+            a_next[0] += trend[k] * (t + 1.0) ** k
+        a[:] = a_next
+        # P = T P T' + R R' - K K' F
+        for i in range(r):
+            for j in range(r):
+                tp_ij = 0.0
+                for k in range(r):
+                    tp_ij += T[i, k] * P[k, j]
+                TP[i, j] = tp_ij
+        for i in range(r):
+            for j in range(r):
+                p_ij = R[i] * R[j] - K[i] * K[j] * F
+                for k in range(r):
+                    p_ij += TP[i, k] * T[j, k]
+                P[i, j] = p_ij
+
+    n_eff = n - burn
+    sigma2 = sum_v2_F / n_eff
+    if sigma2 <= 0.0:
+        return -np.inf
+    return -0.5 * n_eff * (np.log(2.0 * np.pi) + np.log(sigma2) + 1.0) - 0.5 * sum_log_F
+
+
+def arma_concentrated_loglike(y, phi, theta, trend=None, diffuse=False):
+    """
+    Kalman filter log-likelihood of an ARMA(p, q) model, with the innovation
+    variance concentrated out (same as SARIMAX with concentrate_scale=True).
+    The state space form has r = max(p, q+1) states: T holds phi in its first column and
+    ones on its superdiagonal, the selection vector is [1, theta] and Z picks the first state.
+    trend holds the SARIMAX trend parameters (intercept and drift for trend='ct'), which
+    enter the first state as a time varying intercept.
+    By default the state starts from its stationary distribution (SARIMAX with
+    enforce_stationarity=True); with diffuse=True it gets the approximate diffuse
+    initialization of enforce_stationarity=False and the first r observations are burned.
+    Returns -inf if the model is not stationary or the filter breaks down.
+    """
+    if trend is None:
+        trend = np.zeros(0)
+    r = max(phi.shape[0], theta.shape[0] + 1)
+    return _arma_loglike_kernel(y, phi, theta, trend, diffuse, *_get_workspace(r))
+
+
+def compile_arma_likelihood():
+    """
+    Compiles the numba Kalman filter ahead of the grid search for the float32 and float64
+    series it is called with. With cache=True the machine code is written to disk, so the
+    joblib workers load it instead of each compiling it on their first candidate.
+    Returns False if numba is not installed.
+    """
+    if not HAS_NUMBA:
+        return False
+    for dtype in [np.float32, np.float64]:
+        arma_concentrated_loglike(np.zeros(3, dtype=dtype), np.zeros(1), np.zeros(1), np.zeros(2), True)
+    return True
+
+
+def prepare_arma_series(ts_df, d, dtype=np.float64):
+    """
+    Differences the series d times, which is the series that arma_information_criterion scores
+    for any (p, d, q) (like SARIMAX with simple_differencing=True).
+    It only depends on d, so it can be computed once and shared by all the (p, q) candidates.
+    The differencing is done in float64 and only the result is cast to dtype.
+    """
+    return np.ascontiguousarray(np.diff(np.asarray(ts_df, dtype=np.float64), n=d), dtype=dtype)
+
+
+def arma_information_criterion(y, p, q, scoring, maxiter=500):
+    """
+    Scores an ARMA(p, q) candidate with trend='ct' on a series prepared by prepare_arma_series
+    using the numba Kalman filter. This is the same model (and initialization) that _fit_one
+    fits with SARIMAX: the intercept, drift and ARMA coefficients are estimated together by
+    Nelder-Mead. It is only meant for ranking grid candidates; the final model is always
+    fitted with statsmodels.
+    Returns np.nan if the candidate cannot be scored.
+    """
+    n_eff = y.shape[0] - max(p, q + 1)
+    # intercept, drift, ARMA coefficients and the concentrated variance
+    k_params = p + q + 3
+    if n_eff <= k_params + 1:
+        return np.nan
+
+    def neg_loglike(params):
+        llf = arma_concentrated_loglike(y, params[2:2+p], params[2+p:], params[:2], True)
+        return -llf if np.isfinite(llf) else np.inf
+
+    # Start the intercept and drift from a least squares fit of the trend (as SARIMAX does)
+    trend_data = np.c_[np.ones(y.shape[0]), np.arange(1, y.shape[0] + 1)]
+    start_trend = np.linalg.lstsq(trend_data, np.asarray(y, dtype=np.float64), rcond=None)[0]
+    res = minimize(neg_loglike, np.r_[start_trend, np.zeros(p + q)], method='Nelder-Mead',
+                   options={'maxiter': maxiter})
+    llf = -res.fun
+    if not np.isfinite(llf):
+        return np.nan
+
+    criteria = {
+        'aic': -2 * llf + 2 * k_params,
+        'bic': -2 * llf + k_params * np.log(n_eff),
+        'hqic': -2 * llf + 2 * k_params * np.log(np.log(n_eff)),
+        'aicc': -2 * llf + 2 * k_params + 2 * k_params * (k_params + 1) / max(n_eff - k_params - 1, 1),
+    }
+    return criteria.get(scoring.lower(), np.nan)
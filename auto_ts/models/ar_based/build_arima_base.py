@@ -119,7 +119,7 @@ class BuildArimaBase(BuildBase):
             print('Lowering forecast period to %d to enable cross_validation' %self.forecast_period)
         #########################################################################
         extra_concatenated = pd.DataFrame()
-        concatenated = pd.DataFrame()
+        concatenated_folds = []
         norm_rmse_folds2 = []
         
         max_trainsize = len(ts_df) - self.forecast_period
@@ -143,10 +143,6 @@ class BuildArimaBase(BuildBase):
                 if self.verbose >= 1:
                     print(f"\nFold Number: {fold_number+1} --> Train Shape: {ts_train.shape[0]} Test Shape: {ts_test.shape[0]}")
 
-                ### this is needed for static forecasts ####################
-                # TODO: Check if this needs to be fixed to pick usimg self.original_target_col
-                y_truth = ts_train[:]  #  TODO: Note that this is only univariate analysis
-
                 if len(self.original_preds) == 0:
                     exog = None
                 elif len(self.original_preds) == 1:
@@ -156,37 +152,27 @@ class BuildArimaBase(BuildBase):
 
                 auto_arima_model = self.find_best_parameters(data = ts_train)
                 self.model = auto_arima_model
-                y_forecasted = self.model.predict(ts_test.shape[0],exog)
-
-                if fold_number == 0:
-                    concatenated = pd.DataFrame(np.c_[ts_test[self.original_target_col].values,
-                                y_forecasted], columns=['original', 'predicted'],index=ts_test.index)
-                    extra_concatenated = copy.deepcopy(concatenated)
-                else:
-                    concatenated = pd.DataFrame(np.c_[ts_test[self.original_target_col].values,
-                                y_forecasted], columns=['original', 'predicted'],index=ts_test.index)
-                    extra_concatenated = extra_concatenated.append(concatenated)
+                y_forecasted = self.forecast_fold(ts_train, ts_test.shape[0], exog)
 
                 ### for SARIMAX and Auto_ARIMA, you don't have to restore differences since it predicts like actuals.###
-                y_true = concatenated['original']
-                y_pred = concatenated['predicted']
+                y_true = ts_test[self.original_target_col].values
+                y_pred = np.asarray(y_forecasted)
+
+                # The DataFrame is only needed for the model stats across all folds (printed after the loop)
+                concatenated_folds.append(pd.DataFrame({'original': y_true, 'predicted': y_pred}, index=ts_test.index))
 
                 if self.verbose >= 1:
                     print('Static Forecasts:')
                     # Since you are differencing the data, some original data points will not be available
                     # Hence taking from first available value.
-                    print_static_rmse(y_true.values, y_pred.values, verbose=self.verbose)
                     #quick_ts_plot(y_true, y_pred)
-
-                # Extract the dynamic predicted and true values of our time series
-                forecast_df = copy.deepcopy(y_forecasted)
-                forecast_df_folds.append(forecast_df)
-
-
-                rmse, norm_rmse = print_static_rmse(y_true.values, y_pred.values, verbose=0) ## don't print this time
+                rmse, norm_rmse = print_static_rmse(y_true, y_pred, verbose=self.verbose)
                 rmse_folds.append(rmse)
                 norm_rmse_folds.append(norm_rmse)
 
+                # Extract the dynamic predicted and true values of our time series
+                forecast_df_folds.append(y_forecasted)
+
                 # TODO: Convert rmse_folds, rmse_norm_folds, forecasts_folds into base class attributes
                 # TODO: Add gettes and seters for these class attributes.
                 # This will ensure consistency across various model build types.
@@ -200,6 +186,7 @@ class BuildArimaBase(BuildBase):
             # we can revert back to dividing by individual fold std values.
             norm_rmse_folds2 = rmse_folds/ts_df[self.original_target_col].values.std()  # Same as what was there in print_dynamic_rmse()
 
+            extra_concatenated = pd.concat(concatenated_folds)
             print(f"\nSARIMAX RMSE (all folds): {np.mean(rmse_folds):.4f}")
             print(f"SARIMAX Norm RMSE (all folds): {(np.mean(norm_rmse_folds2)*100):.0f}%\n")
             print_ts_model_stats(extra_concatenated['original'],extra_concatenated['predicted'], "auto_SARIMAX")
@@ -211,11 +198,24 @@ class BuildArimaBase(BuildBase):
         self.model = auto_arima_model
         self.refit(ts_df=ts_df)
 
-        print(self.model.summary())
+        if self.verbose >= 1:
+            print(self.model.summary())
 
         # return self.model, forecast_df_folds, rmse_folds, norm_rmse_folds
         return self.model, forecast_df_folds, rmse_folds, norm_rmse_folds2
 
+    def forecast_fold(self, ts_train: pd.DataFrame, steps: int, exog=None):
+        """
+        Forecasts the test part of a cross validation fold with the model found on ts_train
+        By default self.model is an auto_arima model, which predicts the next n periods
+        :param ts_train The training data of the fold
+        :type ts_train pd.DataFrame
+        :param steps The number of periods to forecast
+        :type steps int
+        :param exog The exogenous variables for the forecast period (None if univariate)
+        """
+        return self.model.predict(steps, exog)
+
     def refit(self, ts_df: pd.DataFrame) -> object:
         """
         Refits an already trained model using a new dataset
@@ -229,8 +229,8 @@ class BuildArimaBase(BuildBase):
 
         print(colorful.BOLD + 'Refitting data with previously found best parameters' + colorful.END)
         try:
-            self.model = bestmodel.fit(disp=False)
-            print('    Best %s metric = %0.1f' % (self.scoring, eval('self.model.' + self.scoring)))
+            self.model = bestmodel.fit(method='lbfgs', maxiter=500, disp=False)
+            print('    Best %s metric = %0.1f' % (self.scoring, getattr(self.model, self.scoring)))
         except Exception as e:
             print(e)
 
@@ -254,7 +254,7 @@ class BuildArimaBase(BuildBase):
         """
 
         # In order to get forecasts to be in the same value ranges of the orig_endogs, you
-        # must  set the simple_differencing = False and the start_params to be the same as ARIMA.
+        # must  set the simple_differencing = False.
         # That is the only way to ensure that the output of this model iscomparable to other ARIMA models
 
         if not self.seasonality:
@@ -266,7 +266,7 @@ class BuildArimaBase(BuildBase):
                     enforce_stationarity=False,
                     enforce_invertibility=False,
                     trend='ct',
-                    start_params=[0, 0, 0, 1],
+                    concentrate_scale=True,
                     simple_differencing=False)
             else:
                 bestmodel = SARIMAX(
@@ -276,7 +276,7 @@ class BuildArimaBase(BuildBase):
                     enforce_stationarity=False,
                     enforce_invertibility=False,
                     trend='ct',
-                    start_params=[0, 0, 0, 1],
+                    concentrate_scale=True,
                     simple_differencing=False)
         else:
             if self.univariate:
@@ -288,7 +288,7 @@ class BuildArimaBase(BuildBase):
                     enforce_stationarity=False,
                     enforce_invertibility=False,
                     trend='ct',
-                    start_params=[0, 0, 0, 1],
+                    concentrate_scale=True,
                     simple_differencing=False
                 )
             else:
@@ -300,7 +300,7 @@ class BuildArimaBase(BuildBase):
                     enforce_stationarity=False,
                     enforce_invertibility=False,
                     trend='ct',
-                    start_params=[0, 0, 0, 1],
+                    concentrate_scale=True,
                     simple_differencing=False
                 )
 
@@ -355,14 +355,12 @@ class BuildArimaBase(BuildBase):
                     print("Model was trained with train dataframe. Please make sure you are passing a test data frame.")
                     return
 
-        res_frame = res.summary_frame()
-        res_frame.rename(columns = {'mean':'yhat'}, inplace=True)
-
         if simple:
-            res_frame = res_frame['yhat']
+            # Only the mean forecast is needed, so skip computing the standard errors and confidence intervals
+            res_frame = pd.Series(res.predicted_mean, name='yhat')
             res_frame = res_frame.squeeze() # Convert to a pandas series object
         else:
-            # Pass as is
-            pass
+            res_frame = res.summary_frame()
+            res_frame.rename(columns = {'mean':'yhat'}, inplace=True)
 
         return res_frame
@@ -14,7 +14,8 @@ from .build_arima_base import BuildArimaBase
 
 # helper functions
 from ...utils import colorful, print_static_rmse, print_dynamic_rmse
-from ...models.ar_based.param_finder import find_best_pdq_or_PDQ
+from ...models.ar_based.param_finder import find_best_pdq_or_PDQ, fit_sarimax_cached, clear_fit_cache
+from ...models.ar_based.arma_likelihood import HAS_NUMBA, compile_arma_likelihood
 
 
 # class BuildSarimax(BuildBase):
@@ -120,7 +121,7 @@ class BuildSarimax(BuildArimaBase):
     #         if self.verbose >= 1:
     #             try:
     #                 self.model.plot_diagnostics(figsize=(16, 12))
-    #             except:
+    #             except (np.linalg.LinAlgError, ValueError):
     #                 print('Error: SARIMAX plot diagnostic. Continuing...')
 
     #         ### this is needed for static forecasts ####################
@@ -156,14 +157,14 @@ class BuildSarimax(BuildArimaBase):
     #         if self.verbose >= 1:
     #             ax = concatenated[['original', 'predicted']][self.best_d:].plot(figsize=(16, 12))
     #             startdate = ts_df.index[-self.forecast_period-1]
-    #             pred_dynamic = self.model.get_prediction(start=startdate, dynamic=True, full_results=True)
+    #             pred_dynamic = self.model.get_prediction(start=startdate, dynamic=True)
     #             pred_dynamic_ci = pred_dynamic.conf_int()
     #             pred_dynamic.predicted_mean.plot(label='Dynamic Forecast', ax=ax)
     #             try:
     #                 ax.fill_between(pred_dynamic_ci.index, pred_dynamic_ci.iloc[:, 0],
     #                                 pred_dynamic_ci.iloc[:, 1], color='k', alpha=.25)
     #                 ax.fill_betweenx(ax.get_ylim(), startdate, ts_train.index[-1], alpha=.1, zorder=-1)
-    #             except:
+    #             except (TypeError, ValueError):
     #                 pass
     #             ax.set_xlabel('Date')
     #             ax.set_ylabel('Levels')
@@ -230,10 +231,45 @@ class BuildSarimax(BuildArimaBase):
     #     return self
 
 
+    def __init__(self, scoring, seasonality=False, seasonal_period=None, p_max=12,
+            d_max=2, q_max=12, forecast_period=5, verbose=0, stepwise=True, n_jobs=-1, use_numba=False):
+        """
+        Automatically build a SARIMAX Model
+        stepwise uses the Hyndman-Khandakar stepwise search instead of the full pdq and PDQ grids
+        n_jobs is the number of joblib workers used to fit the pdq and PDQ grids (-1 uses all cores)
+        use_numba scores the non-seasonal pdq candidates with a numba Kalman filter (needs numba installed)
+        """
+        super().__init__(
+            scoring=scoring,
+            seasonality=seasonality,
+            seasonal_period=seasonal_period,
+            p_max=p_max, d_max=d_max, q_max=q_max,
+            forecast_period=forecast_period,
+            verbose=verbose
+        )
+        self.stepwise = stepwise
+        self.n_jobs = n_jobs
+        self.use_numba = use_numba
+
+        try:
+            # The compiled (Cython) Kalman filter is what makes every SARIMAX fit in the grid fast
+            from statsmodels.tsa.statespace import _kalman_filter  # type: ignore
+        except ImportError:
+            print('statsmodels was installed without its compiled Kalman filter. SARIMAX search will be very slow')
+        if self.use_numba and not HAS_NUMBA:
+            print('numba is not installed - hence scoring SARIMAX candidates with statsmodels')
+            self.use_numba = False
+        elif self.use_numba:
+            # Compile once here rather than in every joblib worker during the search
+            compile_arma_likelihood()
+
     def find_best_parameters(self, data: pd.DataFrame):
         """
         Given a dataset, finds the best parameters using the settings in the class
+        and returns the best model fitted on that dataset
         """
+        # Fits cached from a previous dataset (or fold) will not be reused, so drop them
+        clear_fit_cache()
 
         if not self.seasonality:
             if self.verbose >= 1:
@@ -242,13 +278,17 @@ class BuildSarimax(BuildArimaBase):
             # TODO: Check if we need to also pass the exogenous variables here and
             # change the functionality of find_best_pdq_or_PDQ to incorporate these
             # exogenoug variables.
-            self.best_p, self.best_d, self.best_q, best_bic, _ = find_best_pdq_or_PDQ(
+            self.best_p, self.best_d, self.best_q, best_bic, _, self.model = find_best_pdq_or_PDQ(
                 ts_df=data[self.original_target_col],
                 scoring=self.scoring,
                 p_max=self.p_max, d_max=self.d_max, q_max=self.q_max,
                 non_seasonal_pdq=None,
                 seasonal_period=None,
                 seasonality=False,
+                stepwise=self.stepwise,
+                n_jobs=self.n_jobs,
+                use_numba=self.use_numba,
+                fit_best_model=self.univariate,  # multivariate models are fitted with their exog in refit
                 verbose=self.verbose
             )
 
@@ -262,13 +302,17 @@ class BuildSarimax(BuildArimaBase):
             # TODO: Check if we need to also pass the exogenous variables here and
             # change the functionality of find_best_pdq_or_PDQ to incorporate these
             # exogenoug variables.
-            self.best_p, self.best_d, self.best_q, _, _ = find_best_pdq_or_PDQ(
+            self.best_p, self.best_d, self.best_q, _, _, _ = find_best_pdq_or_PDQ(
                 ts_df=data[self.original_target_col],
                 scoring=self.scoring,
                 p_max=self.p_max, d_max=self.d_max, q_max=self.q_max,
                 non_seasonal_pdq=None,  # we need to figure this out ...
                 seasonal_period=None,
                 seasonality=False,  # setting seasonality = False for p, d, q
+                stepwise=self.stepwise,
+                n_jobs=self.n_jobs,
+                use_numba=self.use_numba,
+                fit_best_model=False,  # only the seasonal search below needs to fit its best model
                 verbose=self.verbose
             )
 
@@ -277,13 +321,17 @@ class BuildSarimax(BuildArimaBase):
             # TODO: Check if we need to also pass the exogenous variables here and
             # change the functionality of find_best_pdq_or_PDQ to incorporate these
             # exogenoug variables.
-            self.best_P, self.best_D, self.best_Q, best_bic, self.seasonality = find_best_pdq_or_PDQ(
+            self.best_P, self.best_D, self.best_Q, best_bic, self.seasonality, self.model = find_best_pdq_or_PDQ(
                 ts_df=data[self.original_target_col],
                 scoring=self.scoring,
                 p_max=self.p_max, d_max=self.d_max, q_max=self.q_max,
                 non_seasonal_pdq=(self.best_p, self.best_d, self.best_q), # found previously ...
                 seasonal_period=self.seasonal_period,  # passing seasonal period
                 seasonality=True,  # setting seasonality = True for P, D, Q
+                stepwise=self.stepwise,
+                n_jobs=self.n_jobs,
+                use_numba=self.use_numba,
+                fit_best_model=self.univariate,  # multivariate models are fitted with their exog in refit
                 verbose=self.verbose
             )
 
@@ -298,10 +346,67 @@ class BuildSarimax(BuildArimaBase):
                     print('\nEven though seasonality has been set to True, the best model is a Non Seasonal SARIMAX(%d,%d,%d)' % (
                         self.best_p, self.best_d, self.best_q))
 
+        # For univariate data the search already fitted the best model, so it is returned
+        # (like auto_arima's model in BuildAutoSarimax). Multivariate models are fitted in refit.
+        return self.model
+
+    def forecast_fold(self, ts_train: pd.DataFrame, steps: int, exog=None):
+        """
+        Forecasts the test part of a cross validation fold with the model found on ts_train
+        self.model holds statsmodels SARIMAX results, whose predict takes start and end
+        indices, so this uses forecast instead. Multivariate models are only fitted here,
+        with the exogenous variables of ts_train.
+        Raises a ValueError if the best model could not be fitted on ts_train.
+        :param ts_train The training data of the fold
+        :type ts_train pd.DataFrame
+        :param steps The number of periods to forecast
+        :type steps int
+        :param exog The exogenous variables for the forecast period (None if univariate)
+        """
+        if not self.univariate:
+            self.refit(ts_df=ts_train)
+        if self.model is None:
+            # The fit failed (the error was printed), so there is no model to forecast with
+            raise ValueError('Could not fit the best SARIMAX(%d,%d,%d) model on the training data of this fold' % (
+                self.best_p, self.best_d, self.best_q))
+        return self.model.forecast(steps=steps, exog=exog)
+
 
 
 
 
+    def refit(self, ts_df: pd.DataFrame) -> object:
+        """
+        Refits an already trained model using a new dataset
+        Univariate models are fitted through the param finder's cache, so refitting the
+        same data with the same parameters does not fit the model again. Unlike the
+        grid search, the final model is fitted with the full lbfgs optimizer.
+        :param ts_df The time series data to be used for fitting the model
+        :type ts_df pd.DataFrame
+        :rtype object
+        """
+        if not self.univariate:
+            return super().refit(ts_df=ts_df)
+
+        if self.seasonality:
+            seasonal_order = (self.best_P, self.best_D, self.best_Q, self.seasonal_period)
+        else:
+            seasonal_order = (0, 0, 0, 0)
+
+        print(colorful.BOLD + 'Refitting data with previously found best parameters' + colorful.END)
+        try:
+            self.model = fit_sarimax_cached(
+                ts_df[self.original_target_col],
+                order=(self.best_p, self.best_d, self.best_q),
+                seasonal_order=seasonal_order,
+                method='lbfgs', maxiter=500
+            )
+            print('    Best %s metric = %0.1f' % (self.scoring, getattr(self.model, self.scoring)))
+        except (np.linalg.LinAlgError, ValueError) as e:
+            print(e)
+
+        return self
+
     # def get_best_model(self, data: pd.DataFrame):
     #     """
     #     Returns the 'unfit' SARIMAX model with the given dataset and the
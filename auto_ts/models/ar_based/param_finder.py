@@ -3,14 +3,19 @@ import pandas as pd # type: ignore
 import itertools
 import operator
 import copy
+import functools
 import matplotlib.pyplot as plt # type: ignore
 import seaborn as sns # type: ignore
+from joblib import Parallel, delayed # type: ignore
 # This gives an error when running from a python script. 
 # Maybe, this should be set in the jupyter notebook directly.
 # get_ipython().magic('matplotlib inline')
 sns.set(style="white", color_codes=True)
 # imported SARIMAX from statsmodels pkg for find_best_pdq_or_PDQ
 from statsmodels.tsa.statespace.sarimax import SARIMAX  # type: ignore
+from statsmodels.tsa.stattools import adfuller  # type: ignore
+
+from .arma_likelihood import HAS_NUMBA, prepare_arma_series, arma_information_criterion
 
 
 def find_lowest_pq(df):
@@ -36,68 +41,219 @@ def find_lowest_pq(df):
     return ar_p, ma_q, lowest_bic
 
 
+# Time series seen by fit_sarimax_cached, keyed by _ts_key so that _fit_cached only needs hashable arguments
+_TS_BY_KEY = {}
+
+
+def _ts_key(ts_df):
+    """
+    Returns a hashable key identifying the values (and index) of a time series.
+    """
+    return hash(pd.util.hash_pandas_object(pd.Series(ts_df), index=True).values.tobytes()), len(ts_df)
+
+
+@functools.lru_cache(maxsize=None)
+def _fit_cached(ts_key, order, seasonal_order, trend, method, maxiter):
+    """
+    Builds and fits a SARIMAX model on the series registered under ts_key.
+    Memoized so that the final model and a refit on the same series and orders share one fit.
+    """
+    # In order to get forecasts to be in the same value ranges of the
+    # orig_endogs, you must set the simple_differencing = False.
+    # That is the only way to ensure that the output of this
+    # model is comparable to other ARIMA models.
+    model = SARIMAX(
+        _TS_BY_KEY[ts_key],
+        order=order,
+        seasonal_order=seasonal_order,
+        enforce_stationarity=False,
+        enforce_invertibility=False,
+        trend=trend,
+        concentrate_scale=True,
+        simple_differencing=False
+    )
+    return model.fit(method=method, maxiter=maxiter, disp=False)
+
+
+def fit_sarimax_cached(ts_df, order, seasonal_order=(0, 0, 0, 0), trend='ct', method='lbfgs', maxiter=500):
+    """
+    Fits a univariate SARIMAX model, reusing an earlier fit of the same series and orders if there is one.
+    A seasonal order with no P, D or Q terms is the same model as a non-seasonal one and shares its cache entry.
+    Only meant for the final model and refits; grid candidates are scored by _fit_one without caching.
+    """
+    ts_key = _ts_key(ts_df)
+    _TS_BY_KEY.setdefault(ts_key, ts_df)
+    if tuple(seasonal_order[:3]) == (0, 0, 0):
+        seasonal_order = (0, 0, 0, 0)
+    return _fit_cached(ts_key, tuple(order), tuple(seasonal_order), trend, method, maxiter)
+
+
+def clear_fit_cache():
+    """
+    Drops all the fitted models (and series) held by fit_sarimax_cached.
+    """
+    _fit_cached.cache_clear()
+    _TS_BY_KEY.clear()
+
+
+def _fit_one(ts_df, order, seasonal_order, scoring, arma_series=None):
+    """
+    Fits a single SARIMAX candidate and returns its order along with the scoring metric.
+    This runs inside a joblib worker, so a failed fit is returned as np.nan instead of raising.
+    If the differenced series is passed in arma_series, the candidate is scored with the
+    numba Kalman filter instead.
+    """
+    if arma_series is not None:
+        return order, seasonal_order, arma_information_criterion(arma_series, order[0], order[2], scoring)
+    try:
+        # Only the metric is kept, so the model is fitted on the differenced series
+        # (simple_differencing=True), which has a smaller state space and is cheaper to fit.
+        # The results are not cached: they would stay in the joblib worker and never be reused.
+        model = SARIMAX(
+            ts_df,
+            order=order,
+            seasonal_order=seasonal_order,
+            enforce_stationarity=False,
+            enforce_invertibility=False,
+            trend='ct',
+            concentrate_scale=True,
+            simple_differencing=True
+        )
+        results = model.fit(method='nm', maxiter=50, disp=False)
+        return order, seasonal_order, getattr(results, scoring)
+    except (np.linalg.LinAlgError, ValueError):
+        return order, seasonal_order, np.nan
+
+
+def find_differencing_order(ts_df, d_min, d_max, non_seasonal_d=0, seasonal_period=None, alpha=0.05):
+    """
+    Returns the smallest differencing order between d_min and d_max for which the
+    Augmented Dickey-Fuller test rejects a unit root (p-value < alpha), or d_max if none does.
+    If the series gets too short to run the test, the last order that could be tested
+    (or d_min) is returned instead.
+    If seasonal_period is given, the series is first differenced non_seasonal_d times and
+    the returned order is the number of seasonal differences (D) at lag seasonal_period.
+    """
+    values = np.diff(np.asarray(ts_df, dtype=float), n=non_seasonal_d)
+    lag = seasonal_period if seasonal_period else 1
+    last_tested = d_min
+    for d_val in range(d_max+1):
+        if d_val >= d_min:
+            try:
+                if adfuller(values, autolag='AIC')[1] < alpha:
+                    return d_val
+            except (ValueError, np.linalg.LinAlgError):
+                # Too few observations left after differencing to run the test
+                return last_tested
+            last_tested = d_val
+        values = values[lag:] - values[:-lag]
+    return d_max
+
+
+def _score_pq(ts_df, pq_list, d_val, non_seasonal_pdq, seasonal_period, seasonal_search, scoring, n_jobs,
+              use_numba=False):
+    """
+    Fits every (p, q) pair in pq_list (or (P, Q) pair when seasonal_search is True) at
+    differencing d_val and returns a dictionary of (p, q) -> scoring metric.
+    """
+    candidates = []
+    for p_val, q_val in pq_list:
+        if seasonal_search:
+            candidates.append((tuple(non_seasonal_pdq), (p_val, d_val, q_val, seasonal_period)))
+        else:
+            candidates.append(((p_val, d_val, q_val), (0, 0, 0, 0)))
+
+    # The differenced series only depends on d, so prepare it once for all the candidates.
+    # float32 halves the size of the series sent to the workers and read by the Kalman filter,
+    # and is precise enough to rank the candidates; the filter itself still works in float64.
+    arma_series = None
+    if use_numba and HAS_NUMBA and not seasonal_search:
+        arma_series = prepare_arma_series(ts_df, d_val, dtype=np.float32)
+
+    # Each (p, d, q) or (P, D, Q) fit is independent of the others, so they are fitted in parallel.
+    fits = Parallel(n_jobs=n_jobs, backend='loky')(
+        delayed(_fit_one)(ts_df, order, seasonal_order, scoring, arma_series)
+        for order, seasonal_order in candidates
+    )
+    return {pq: metric for pq, (_, _, metric) in zip(pq_list, fits)}
+
+
 def find_best_pdq_or_PDQ(ts_df, scoring, p_max, d_max, q_max, non_seasonal_pdq,
-                         seasonal_period, seasonality=False, verbose=0):
+                         seasonal_period, seasonality=False, stepwise=True, max_no_improvement=3,
+                         n_jobs=-1, use_numba=False, fit_best_model=True, verbose=0):
     p_min = 0
     d_min = 0
     q_min = 0
-    if seasonality:
-        ns_p = non_seasonal_pdq[0]
-        ns_d = non_seasonal_pdq[1]
-        ns_q = non_seasonal_pdq[2]
+    # seasonality is toggled below depending on whether a D value yields any model,
+    # so keep track of which kind of grid (pdq or PDQ) the caller asked for.
+    seasonal_search = seasonality
+    # Convert the series once to a contiguous float64 array so statsmodels does not have to
+    # coerce and copy it again for every candidate (and it is cheaper to send to the workers).
+    # The pandas series (and its index) is only needed for the final model.
+    ts_train_arr = np.ascontiguousarray(np.asarray(ts_df), dtype=np.float64)
+    # Rather than searching over every d (or D), use a stationarity test on the
+    # differenced series to pick a single differencing order to search over.
+    if seasonal_search:
+        best_d = find_differencing_order(ts_train_arr, d_min, d_max, non_seasonal_d=non_seasonal_pdq[1],
+                                         seasonal_period=seasonal_period)
+    else:
+        best_d = find_differencing_order(ts_train_arr, d_min, d_max)
+    print('    Stationarity (ADF) test selects differencing = %d' % best_d)
     # Initialize a DataFrame to store the results
-    iteration = 0
     results_dict = {}
     seasonality_dict = {}
-    for d_val in range(d_min, d_max+1):
+    for d_val in [best_d]:
         print(f"\nDifferencing = {d_val} with Seasonality = {seasonality}")
         results_bic = pd.DataFrame(index=['AR{}'.format(i) for i in range(p_min, p_max+1)],
                                    columns=['MA{}'.format(i) for i in range(q_min, q_max+1)])
-        for p_val, q_val in itertools.product(range(p_min,p_max+1), range(q_min, q_max+1)):
-            if p_val == 0 and d_val == 0 and q_val == 0:
-                results_bic.loc['AR{}'.format(p_val), 'MA{}'.format(q_val)] = np.nan
-                continue
-            try:
-                if seasonality:
-                    # In order to get forecasts to be in the same value ranges of the
-                    # orig_endogs, you must set the simple_differencing = False and
-                    # the start_params to be the same as ARIMA.
-                    # That is the only way to ensure that the output of this
-                    # model is comparable to other ARIMA models
-                    
-                    model = SARIMAX(
-                        ts_df,
-                        order=(ns_p, ns_d, ns_q),
-                        seasonal_order=(p_val, d_val, q_val, seasonal_period),
-                        enforce_stationarity=False,
-                        enforce_invertibility=False,
-                        trend='ct',
-                        start_params=[0, 0, 0, 1],
-                        simple_differencing=False
-                    )
+        if stepwise:
+            # Hyndman-Khandakar stepwise search: fit a few small seed models, then keep
+            # moving p, q or both by one around the current best model until no neighbor improves.
+            pq_list = [(p_val, q_val) for p_val, q_val in [(0, 0), (1, 0), (0, 1), (2, 2)]
+                       if p_val <= p_max and q_val <= q_max and not (p_val == 0 and d_val == 0 and q_val == 0)]
+            scores = _score_pq(ts_train_arr, pq_list, d_val, non_seasonal_pdq, seasonal_period,
+                               seasonal_search, scoring, n_jobs, use_numba)
+            best_pq = None
+            while True:
+                fitted = {pq: metric for pq, metric in scores.items() if not np.isnan(metric)}
+                if not fitted or min(fitted, key=fitted.get) == best_pq:
+                    break
+                best_pq = min(fitted, key=fitted.get)
+                pq_list = [(best_pq[0]+step_p, best_pq[1]+step_q)
+                           for step_p, step_q in [(-1, 0), (1, 0), (0, -1), (0, 1),
+                                                  (-1, -1), (1, 1), (-1, 1), (1, -1)]]
+                pq_list = [(p_val, q_val) for p_val, q_val in pq_list
+                           if p_min <= p_val <= p_max and q_min <= q_val <= q_max
+                           and not (p_val == 0 and d_val == 0 and q_val == 0)
+                           and (p_val, q_val) not in scores]
+                if not pq_list:
+                    break
+                scores.update(_score_pq(ts_train_arr, pq_list, d_val, non_seasonal_pdq, seasonal_period,
+                                        seasonal_search, scoring, n_jobs, use_numba))
+        else:
+            # Fit the grid from the simplest models up, one p+q level at a time, and stop
+            # once max_no_improvement levels in a row have not lowered the best metric.
+            pq_list = sorted([(p_val, q_val) for p_val, q_val in itertools.product(range(p_min,p_max+1), range(q_min, q_max+1))
+                              if not (p_val == 0 and d_val == 0 and q_val == 0)], key=sum)
+            scores = {}
+            best_metric = np.inf
+            no_improvement = 0
+            for _, level in itertools.groupby(pq_list, key=sum):
+                level_scores = _score_pq(ts_train_arr, list(level), d_val, non_seasonal_pdq, seasonal_period,
+                                         seasonal_search, scoring, n_jobs, use_numba)
+                scores.update(level_scores)
+                level_metrics = [metric for metric in level_scores.values() if not np.isnan(metric)]
+                if level_metrics and min(level_metrics) < best_metric:
+                    best_metric = min(level_metrics)
+                    no_improvement = 0
                 else:
-                    model = SARIMAX(
-                        ts_df,
-                        order=(p_val, d_val, q_val),
-                        enforce_stationarity=False,
-                        enforce_invertibility=False,
-                        trend='ct',
-                        start_params=[0, 0, 0, 1],
-                        simple_differencing=False
-                    )
-
-                results = model.fit(disp=False)   
-
-                results_bic.loc['AR{}'.format(p_val), 'MA{}'.format(q_val)] = eval('results.' + scoring)
-                if iteration % 10 == 0:
-                    print('    Iteration %d completed...' % iteration)
-                    iteration += 1
-                elif iteration >= 100:
-                    print('    Ending Iterations at %d' % iteration)
+                    no_improvement += 1
+                if no_improvement >= max_no_improvement:
+                    print('    No improvement in %d p+q levels. Ending search early' % no_improvement)
                     break
-            except:
-                iteration += 1
-                continue
+        for (p_val, q_val), metric in scores.items():
+            results_bic.loc['AR{}'.format(p_val), 'MA{}'.format(q_val)] = metric
+        print('    %d models fitted...' % len(scores))
         results_bic = results_bic[results_bic.columns].astype(float)
 
         # # TODO: Print if needed
@@ -128,14 +284,31 @@ def find_best_pdq_or_PDQ(ts_df, scoring, p_max, d_max, q_max, non_seasonal_pdq,
         best_p = int(best_pdq.split(' ')[0])
         best_d = int(best_pdq.split(' ')[1])
         best_q = int(best_pdq.split(' ')[2])
-    except:
-        best_p = copy.deepcopy(p_val)
-        best_q = copy.deepcopy(q_val)
-        best_d = copy.deepcopy(d_val)
+    except ValueError:
+        # No differencing order produced a model
+        best_p = copy.deepcopy(p_max)
+        best_q = copy.deepcopy(q_max)
+        best_d = copy.deepcopy(d_max)
         best_bic = 0
 
     # # TODO: Print if needed
     # print(f"Seasonal Dictionary: {seasonality_dict}")
-    
+
+    best_model = None
+    if fit_best_model:
+        if seasonal_search and seasonality_dict.get(best_d):
+            best_order, best_seasonal_order = tuple(non_seasonal_pdq), (best_p, best_d, best_q, seasonal_period)
+        elif seasonal_search:
+            best_order, best_seasonal_order = tuple(non_seasonal_pdq), (0, 0, 0, 0)
+        else:
+            best_order, best_seasonal_order = (best_p, best_d, best_q), (0, 0, 0, 0)
+        # The candidates were only scored with a cheap optimizer, so fit the best one properly.
+        # This is fitted on the pandas series (not the array) so that it keeps the time index.
+        try:
+            best_model = fit_sarimax_cached(ts_df, best_order, best_seasonal_order, method='lbfgs', maxiter=500)
+        except (np.linalg.LinAlgError, ValueError) as e:
+            print(e)
+            print('    Error fitting the best SARIMAX model. Continuing...')
+
     # return best_p, best_d, best_q, best_bic, seasonality
-    return best_p, best_d, best_q, best_bic, seasonality_dict.get(best_d)
+    return best_p, best_d, best_q, best_bic, seasonality_dict.get(best_d), best_model
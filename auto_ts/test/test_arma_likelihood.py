@@ -0,0 +1,94 @@
+"""
+Unit Tests for the numba ARMA likelihood
+
+The Kalman filter is checked against the statsmodels SARIMAX log-likelihood and candidate ranking.
+"""
+
+import sys
+import os
+import unittest
+import numpy as np # type: ignore
+from statsmodels.tsa.statespace.sarimax import SARIMAX  # type: ignore
+
+sys.path.append(os.environ['DEV_AUTOTS'])
+from auto_ts.models.ar_based import arma_likelihood, param_finder
+
+
+class TestArmaLikelihood(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(42)
+        noise = rng.normal(size=300)
+        # ARMA(1, 1) series with phi = 0.5 and theta = 0.3
+        self.y = np.zeros(300)
+        for t in range(1, 300):
+            self.y[t] = 0.5 * self.y[t-1] + noise[t] + 0.3 * noise[t-1]
+
+    def test_matches_sarimax(self):
+        """
+        Test 1: The concentrated log-likelihood matches SARIMAX with concentrate_scale=True
+        """
+        params = {
+            (0, 0): ([], []),
+            (1, 0): ([0.5], []),
+            (0, 1): ([], [0.3]),
+            (1, 1): ([0.5], [0.3]),
+            (2, 1): ([0.4, 0.2], [-0.3]),
+            (1, 2): ([0.6], [0.2, 0.1]),
+            (2, 2): ([0.3, -0.2], [0.4, 0.1]),
+            (3, 0): ([0.3, 0.2, -0.1], []),
+        }
+        for (p, q), (phi, theta) in params.items():
+            with self.subTest(p=p, q=q):
+                phi, theta = np.array(phi, dtype=float), np.array(theta, dtype=float)
+                expected = SARIMAX(self.y, order=(p, 0, q), concentrate_scale=True).loglike(np.r_[phi, theta])
+                actual = arma_likelihood.arma_concentrated_loglike(self.y, phi, theta)
+                self.assertAlmostEqual(actual, expected, delta=1e-6)
+
+    def test_nonstationary_is_minus_inf(self):
+        """
+        Test 2: A unit root or explosive AR coefficient gives -inf (with fastmath=True)
+        """
+        for phi in [1.0, 1.2]:
+            with self.subTest(phi=phi):
+                llf = arma_likelihood.arma_concentrated_loglike(self.y, np.array([phi]), np.zeros(0))
+                self.assertEqual(llf, -np.inf)
+
+    def test_trend_matches_sarimax(self):
+        """
+        Test 3: With a trend, the log-likelihood matches SARIMAX with trend='ct' for both
+        the stationary and the approximate diffuse (enforce_stationarity=False) initialization
+        """
+        y = np.cumsum(self.y) + 0.1 * np.arange(300)
+        for (p, q) in [(0, 0), (1, 0), (0, 1), (2, 1), (1, 2)]:
+            params = np.r_[0.3, 0.01, np.linspace(-0.3, 0.3, p + q)]
+            for enforce_stationarity in [True, False]:
+                with self.subTest(p=p, q=q, enforce_stationarity=enforce_stationarity):
+                    expected = SARIMAX(y, order=(p, 1, q), trend='ct', concentrate_scale=True,
+                                       enforce_stationarity=enforce_stationarity,
+                                       simple_differencing=True).loglike(params)
+                    actual = arma_likelihood.arma_concentrated_loglike(
+                        np.diff(y), params[2:2+p], params[2+p:], params[:2], not enforce_stationarity)
+                    self.assertAlmostEqual(actual, expected, delta=1e-6)
+
+    def test_ranking_matches_sarimax(self):
+        """
+        Test 4: The numba scorer ranks the candidates of a differenced series with a trend
+        the same way as the SARIMAX candidate fits in the param finder
+        """
+        noise = np.random.RandomState(0).normal(size=150)
+        x = np.zeros(150)
+        for t in range(1, 150):
+            x[t] = 0.6 * x[t-1] + noise[t]
+        y = np.cumsum(x) + 0.5 * np.arange(150) + 0.01 * np.arange(150)**2
+        arma_series = arma_likelihood.prepare_arma_series(y, 1, dtype=np.float32)
+        candidates = [(0, 0), (1, 0), (0, 1), (1, 1), (2, 0), (0, 2)]
+        sarimax_bic = [param_finder._fit_one(y, (p, 1, q), (0, 0, 0, 0), 'bic')[2] for p, q in candidates]
+        numba_bic = [arma_likelihood.arma_information_criterion(arma_series, p, q, 'bic') for p, q in candidates]
+        self.assertEqual(list(np.argsort(numba_bic)), list(np.argsort(sarimax_bic)))
+        for expected, actual in zip(sarimax_bic, numba_bic):
+            self.assertAlmostEqual(actual, expected, delta=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Unit Tests for the SARIMAX parameter finder
+
+Stepwise search is tested with a mocked candidate scorer, so no models are fitted.
+"""
+
+import sys
+import os
+import unittest
+from unittest import mock
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+sys.path.append(os.environ['DEV_AUTOTS'])
+from auto_ts.models.ar_based import param_finder
+
+
+class TestStepwiseSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.ts = pd.Series(np.arange(50, dtype=float))
+        self.calls = []
+
+    def run_stepwise(self, best_pq, p_max, q_max):
+        """
+        Runs the stepwise search with d fixed at 1 and a metric that is lowest at best_pq.
+        Returns the best (p, q) found; every batch of (p, q) pairs scored is kept in self.calls.
+        """
+        def fake_score_pq(ts_df, pq_list, d_val, *args, **kwargs):
+            self.calls.append(list(pq_list))
+            return {(p_val, q_val): 100.0 + (p_val - best_pq[0])**2 + (q_val - best_pq[1])**2
+                    for p_val, q_val in pq_list}
+
+        with mock.patch.object(param_finder, '_score_pq', side_effect=fake_score_pq), \
+                mock.patch.object(param_finder, 'find_differencing_order', return_value=1):
+            best_p, best_d, best_q, _, _, best_model = param_finder.find_best_pdq_or_PDQ(
+                self.ts, 'bic', p_max, 1, q_max, None, None,
+                seasonality=False, stepwise=True, n_jobs=1, fit_best_model=False)
+        self.assertEqual(best_d, 1)
+        self.assertIsNone(best_model)
+        return best_p, best_q
+
+    def test_seeds(self):
+        """
+        Test 1: The search starts from the seed models
+        """
+        self.run_stepwise(best_pq=(2, 2), p_max=3, q_max=3)
+        self.assertEqual(self.calls[0], [(0, 0), (1, 0), (0, 1), (2, 2)])
+
+    def test_seeds_filtered_by_max_order(self):
+        """
+        Test 2: Seeds above p_max or q_max are not fitted
+        """
+        self.run_stepwise(best_pq=(1, 1), p_max=1, q_max=3)
+        self.assertEqual(self.calls[0], [(0, 0), (1, 0), (0, 1)])
+        for pq_list in self.calls:
+            for p_val, q_val in pq_list:
+                self.assertLessEqual(p_val, 1)
+
+    def test_neighbor_expansion_and_termination(self):
+        """
+        Test 3: Only the +/-1 neighbors of the current best are fitted and the search
+        stops once the best model no longer moves
+        """
+        best_p, best_q = self.run_stepwise(best_pq=(3, 2), p_max=5, q_max=5)
+        self.assertEqual((best_p, best_q), (3, 2))
+        self.assertEqual(self.calls, [
+            [(0, 0), (1, 0), (0, 1), (2, 2)],
+            # neighbors of the best seed (2, 2)
+            [(1, 2), (3, 2), (2, 1), (2, 3), (1, 1), (3, 3), (1, 3), (3, 1)],
+            # neighbors of (3, 2) that were not fitted yet
+            [(4, 2), (4, 3), (4, 1)],
+        ])
+
+    def test_diagonal_neighbors(self):
+        """
+        Test 4: p and q are also moved together, so an optimum that is only a diagonal
+        step away from the best seed is found
+        """
+        def fake_score_pq(ts_df, pq_list, d_val, *args, **kwargs):
+            self.calls.append(list(pq_list))
+            # (2, 2) beats all the other seeds and its p-only and q-only neighbors
+            metrics = {(2, 2): 110.0, (1, 1): 100.0}
+            return {pq: metrics.get(pq, 120.0) for pq in pq_list}
+
+        with mock.patch.object(param_finder, '_score_pq', side_effect=fake_score_pq), \
+                mock.patch.object(param_finder, 'find_differencing_order', return_value=1):
+            best_p, _, best_q, best_metric, _, _ = param_finder.find_best_pdq_or_PDQ(
+                self.ts, 'bic', 3, 1, 3, None, None,
+                seasonality=False, stepwise=True, n_jobs=1, fit_best_model=False)
+        self.assertEqual((best_p, best_q), (1, 1))
+        self.assertEqual(best_metric, 100.0)
+
+
+class TestDifferencingOrder(unittest.TestCase):
+
+    def setUp(self):
+        self.noise = np.random.RandomState(0).normal(size=200)
+
+    def test_white_noise(self):
+        """
+        Test 1: White noise is already stationary and needs no differencing
+        """
+        self.assertEqual(param_finder.find_differencing_order(self.noise, 0, 2), 0)
+
+    def test_random_walk(self):
+        """
+        Test 2: A random walk needs to be differenced once
+        """
+        self.assertEqual(param_finder.find_differencing_order(np.cumsum(self.noise), 0, 2), 1)
+
+    def test_series_too_short(self):
+        """
+        Test 3: If the test cannot run on the differenced series, the last order
+        that could be tested is returned instead of d_max
+        """
+        with mock.patch.object(param_finder, 'adfuller',
+                               side_effect=[(0.0, 0.9), (0.0, 0.9), ValueError('sample size is too short')]):
+            self.assertEqual(param_finder.find_differencing_order(self.noise, 0, 3), 1)
+        with mock.patch.object(param_finder, 'adfuller', side_effect=ValueError('sample size is too short')):
+            self.assertEqual(param_finder.find_differencing_order(self.noise, 1, 3), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Unit Tests for BuildSarimax
+
+Cross validation folds are forecast with the statsmodels results API (out of sample),
+for both univariate and multivariate data.
+"""
+
+import sys
+import os
+import unittest
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+sys.path.append(os.environ['DEV_AUTOTS'])
+from auto_ts.models.ar_based import BuildSarimax
+
+
+class TestSarimax(unittest.TestCase):
+
+    def setUp(self):
+        datapath = 'example_datasets/'
+        filename1 = 'Sales_and_Marketing.csv'
+        dft = pd.read_csv(datapath+filename1, index_col=None)
+
+        self.ts_column = 'Time Period'
+        self.target = 'Sales'
+        dft.index = pd.DatetimeIndex(dft.pop(self.ts_column), freq='MS')
+
+        self.train_multivar = dft[:40]
+        self.test_multivar = dft[40:]
+
+        self.train_univar = dft[:40][[self.target]]
+        self.test_univar = dft[40:][[self.target]]
+
+        self.forecast_period = 8
+
+    def build(self, train):
+        """
+        Fits a small non-seasonal BuildSarimax with 2 fold cross validation
+        """
+        model_build = BuildSarimax(
+            scoring='bic', seasonality=False, seasonal_period=12,
+            p_max=2, d_max=1, q_max=2, forecast_period=5, n_jobs=1)
+        model, forecast_df_folds, rmse_folds, _ = model_build.fit(train, self.target, cv=2)
+        self.assertEqual(len(forecast_df_folds), 2)
+        for forecast in forecast_df_folds:
+            self.assertEqual(len(forecast), 5)
+        self.assertTrue(np.all(np.isfinite(rmse_folds)))
+        return model_build
+
+    def test_univar_CV(self):
+        """
+        Test 1: Univariate With CV
+        """
+        model_build = self.build(self.train_univar)
+
+        forecast = model_build.forecast_fold(self.train_univar, self.forecast_period)
+        self.assertEqual(len(forecast), self.forecast_period)
+        self.assertTrue(forecast.index.equals(self.test_univar.index[:self.forecast_period]))
+
+        # The refit after the search is served from the param finder's cache
+        best_model = model_build.find_best_parameters(data=self.train_univar)
+        model_build.refit(ts_df=self.train_univar)
+        self.assertIs(model_build.model, best_model)
+
+    def test_multivar_CV(self):
+        """
+        Test 2: Multivariate With CV
+        """
+        model_build = self.build(self.train_multivar)
+
+        exog = self.test_multivar[model_build.original_preds].values[:self.forecast_period]
+        forecast = model_build.forecast_fold(self.train_multivar, self.forecast_period, exog)
+        self.assertEqual(len(forecast), self.forecast_period)
+        self.assertTrue(forecast.index.equals(self.test_multivar.index[:self.forecast_period]))
+
+    def test_failed_fit(self):
+        """
+        Test 3: A fold whose model could not be fitted raises a clear error
+        """
+        model_build = self.build(self.train_univar)
+        model_build.model = None
+        with self.assertRaisesRegex(ValueError, 'Could not fit the best SARIMAX'):
+            model_build.forecast_fold(self.train_univar, self.forecast_period)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,6 +25,7 @@ setuptools.setup(
         "seaborn",
         "prophet",
         "scikit-learn>=0.24.0",
+        "joblib",
         "statsmodels",
         "xgboost>=1.5.1",
         "prettytable",